@@ -1,11 +1,38 @@
 import asyncio
-from aiopath import AsyncPath
-from aioshutil import copyfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import argparse
+import errno
+import shutil
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 from time import time
 import datetime
 import os
+import sys
+from pathlib import Path
+
+try:
+    import uvloop
+except ImportError:  # uvloop — необов'язкова залежність, недоступна на Windows
+    uvloop = None
+
+
+# Кількість файлів, що копіюються одночасно (за замовчуванням)
+WORKERS = 64
+
+# Максимальний обсяг даних за один виклик copy_file_range
+COPY_CHUNK_SIZE = 1 << 30
+
+# Помилки copy_file_range, за яких копіюємо звичайним shutil.copyfile
+_COPY_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM}
+
+# Інтервал виведення прогресу копіювання, секунд
+PROGRESS_INTERVAL = 1.0
+
+# Папки розширень, уже створені під час поточного запуску
+_created_dirs: set[Path] = set()
 
 
 def parse_args():
@@ -13,23 +40,35 @@ def parse_args():
     Обробляє аргументи командного рядка для отримання шляхів до вихідної та цільової папок.
     
     Повертає:
-    Namespace: Об'єкт, що містить аргументи source_folder і output_folder.
+    Namespace: Об'єкт, що містить аргументи source_folder, output_folder і workers.
     """
     parser = argparse.ArgumentParser(description='Асинхронне сортування файлів за розширенням.')
     parser.add_argument('source_folder', type=str, help='Шлях до вихідної папки.')
     parser.add_argument('--output_folder', type=str, help='Шлях до папки призначення (необов’язково).')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f'Кількість файлів, що копіюються одночасно (за замовчуванням {WORKERS}).')
     return parser.parse_args()
 
 
-def setup_logging():
+def setup_logging() -> QueueListener:
     """
-    Налаштовує логування: створює файл для запису логів.
+    Налаштовує логування: записи потрапляють у чергу, а у файл їх пише окремий потік,
+    щоб запис логів не блокував цикл подій.
+    
+    Повертає:
+    QueueListener: Запущений обробник черги; його потрібно зупинити після завершення роботи.
     """
-    logging.basicConfig(
-        filename='file_sorting.log',
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-    )
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler('file_sorting.log', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    return listener
 
 
 def create_default_output_folder() -> str:
@@ -46,84 +85,229 @@ def create_default_output_folder() -> str:
     return output_folder
 
 
-async def read_folder(path: AsyncPath, output_folder: AsyncPath) -> None:
+def walk_files(source: str) -> list[str]:
     """
-    Рекурсивно читає файли у вихідній папці та копіює їх у відповідну підпапку за розширенням.
+    Синхронно обходить дерево вихідної папки та збирає шляхи до всіх файлів.
+    Тип запису береться з DirEntry (d_type), тож для звичайних файлів і папок
+    додатковий stat не виконується. Символьні посилання на папки не обходяться
+    (щоб уникнути циклів) — вони пропускаються із записом у лог; спеціальні файли
+    (FIFO, сокети) також пропускаються.
     
     Аргументи:
-    path (AsyncPath): Шлях до вихідної папки.
-    output_folder (AsyncPath): Шлях до папки призначення.
+    source (str): Шлях до вихідної папки.
+    
+    Повертає:
+    list[str]: Шляхи до файлів.
+    """
+    files = []
+    folders = [source]
+    while folders:
+        folder = folders.pop()
+        try:
+            entries = os.scandir(folder)
+        except OSError as e:
+            # Як і os.walk, пропускаємо папки, які не вдалося прочитати
+            logging.error("Не вдалося прочитати папку %s: %s", folder, e)
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.path)
+                elif entry.is_dir():
+                    logging.warning("Пропущено символьне посилання на папку %s", entry.path)
+    return files
+
+
+async def produce_files(source: Path, file_queue: asyncio.Queue, workers: int, progress: Counter) -> None:
+    """
+    Обходить вихідну папку одним викликом у окремому потоці та передає шляхи файлів у чергу.
+    
+    Аргументи:
+    source (Path): Шлях до вихідної папки.
+    file_queue (asyncio.Queue): Черга шляхів файлів для копіювання.
+    workers (int): Кількість споживачів, яким потрібно передати сигнал завершення.
+    progress (Counter): Лічильники прогресу; тут заповнюється загальна кількість файлів.
+    """
+    files = await asyncio.to_thread(walk_files, str(source))
+    # Шлях призначення (розширення/ім'я) залежить лише від імені файлу, тож файли з
+    # однаковими іменами з різних папок потрапили б в одне місце. Щоб потоки не писали
+    # в один файл одночасно, лишаємо останній — як при послідовному копіюванні
+    unique_files = list({os.path.basename(file): file for file in files}.values())
+    if len(unique_files) < len(files):
+        logging.info("Пропущено файлів з повторюваними іменами: %d", len(files) - len(unique_files))
+    files = unique_files
+    progress['total'] = len(files)
+    for file in files:
+        await file_queue.put(file)
+    for _ in range(workers):
+        await file_queue.put(None)  # Сигнал завершення для кожного споживача
+
+
+async def consume_files(file_queue: asyncio.Queue, output_folder: Path, progress: Counter) -> None:
     """
-    async for el in path.iterdir():
-        if await el.is_dir():
-            await read_folder(el, output_folder)
+    Бере шляхи файлів з черги та копіює їх у підпапки за розширенням.
+    
+    Аргументи:
+    file_queue (asyncio.Queue): Черга шляхів файлів для копіювання.
+    output_folder (Path): Шлях до папки призначення.
+    progress (Counter): Лічильники прогресу; тут збільшується кількість скопійованих файлів.
+    """
+    while (file := await file_queue.get()) is not None:
+        try:
+            await copy_file(file, output_folder)
+            progress['copied'] += 1
+        except Exception as e:
+            logging.error("Помилка під час копіювання файлу %s: %s", file, e)
+            # У терміналі рядок прогресу не завершено переносом — починаємо з нового рядка
+            prefix = '\n' if sys.stdout.isatty() else ''
+            print(f"{prefix}Помилка під час копіювання файлу {file}. Деталі у лог-файлі.")
+
+
+async def report_progress(progress: Counter) -> None:
+    """
+    Періодично виводить кількість скопійованих файлів замість рядка на кожен файл.
+    
+    Аргументи:
+    progress (Counter): Лічильники прогресу (total, copied).
+    """
+    interactive = sys.stdout.isatty()
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        line = f"Скопійовано файлів: {progress['copied']}/{progress['total']}"
+        if interactive:
+            # У терміналі оновлюємо один рядок на місці
+            print(f"\r{line}", end='', flush=True)
         else:
+            print(line, flush=True)
+
+
+def fast_copy(src: str, dst: str) -> None:
+    """
+    Копіює файл засобами ядра (copy_file_range), без перекладання даних через Python.
+    Файли відкриваються через os.open: на відміну від open() це не додає ioctl/lseek
+    на кожен файл. Якщо системний виклик недоступний, використовує shutil.copyfile.
+    
+    Аргументи:
+    src (str): Шлях до вихідного файлу.
+    dst (str): Шлях до файлу призначення.
+    
+    Викидає:
+    shutil.SameFileError: Якщо src і dst — один і той самий файл.
+    """
+    if hasattr(os, 'copy_file_range'):
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            # Без O_TRUNC: спершу перевіряємо, що це не той самий файл, інакше обнулимо джерело
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT, 0o666)
             try:
-                await copy_file(el, output_folder)
-            except Exception as e:
-                logging.error(f"Помилка під час копіювання файлу {el}: {e}")
-                print(f"Помилка під час копіювання файлу {el}. Деталі у лог-файлі.")
+                src_stat, dst_stat = os.fstat(src_fd), os.fstat(dst_fd)
+                if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+                    raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+                os.ftruncate(dst_fd, 0)
+                # Деякі ФС повертають 0 на нульовому зміщенні, нічого не скопіювавши, —
+                # тоді, як і CPython, переходимо до shutil.copyfile
+                if os.copy_file_range(src_fd, dst_fd, COPY_CHUNK_SIZE) > 0:
+                    while os.copy_file_range(src_fd, dst_fd, COPY_CHUNK_SIZE) > 0:
+                        pass
+                    return
+            except shutil.SameFileError:
+                raise
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    shutil.copyfile(src, dst)
 
 
-async def copy_file(file: AsyncPath, output_folder: AsyncPath) -> None:
+async def copy_file(file: str, output_folder: Path) -> None:
     """
     Копіює файл у підпапку за його розширенням.
     
     Аргументи:
-    file (AsyncPath): Шлях до файлу.
-    output_folder (AsyncPath): Шлях до папки призначення.
+    file (str): Шлях до файлу.
+    output_folder (Path): Шлях до папки призначення.
     """
-    ext = file.suffix.lower().strip('.')
+    # Розширення виділяємо рядковими операціями, без створення Path для кожного файлу
+    name = os.path.basename(file)
+    dot = name.rfind('.')
+    ext = name[dot + 1:].lower() if dot > 0 else ''
     new_path = output_folder / ext
 
-    try:
-        # Створюємо папку, якщо її не існує
-        await new_path.mkdir(exist_ok=True, parents=True)
-        logging.info(f"Створено папку для розширення .{ext}: {new_path}")
-    except Exception as e:
-        logging.error(f"Помилка створення папки {new_path}: {e}")
-        raise
+    if new_path not in _created_dirs:
+        try:
+            # Створюємо папку лише для першого файлу з таким розширенням
+            new_path.mkdir(exist_ok=True, parents=True)
+            _created_dirs.add(new_path)
+            logging.info("Створено папку для розширення .%s: %s", ext, new_path)
+        except Exception as e:
+            logging.error("Помилка створення папки %s: %s", new_path, e)
+            raise
 
     try:
-        print(f"Копіюється файл {file.name} до {new_path}")
-        logging.info(f"Копіюється файл {file.name} до {new_path}")
-        await copyfile(file, new_path / file.name)
+        # Запис на кожен файл — лише на рівні DEBUG; аргументи форматуються ліниво
+        logging.debug("Копіюється файл %s до %s", name, new_path)
+        await asyncio.to_thread(fast_copy, file, os.path.join(new_path, name))
     except Exception as e:
-        logging.error(f"Помилка копіювання файлу {file.name}: {e}")
+        logging.error("Помилка копіювання файлу %s: %s", name, e)
         raise
 
 
 async def main():
     args = parse_args()
 
-    source = AsyncPath(args.source_folder)
-    output_folder = AsyncPath(args.output_folder or create_default_output_folder())
+    source = Path(args.source_folder)
+    output_folder = Path(args.output_folder or create_default_output_folder())
 
     # Перевірка на існування вихідної папки
-    if not await source.exists() or not await source.is_dir():
+    if not source.is_dir():
         print(f"Вихідна папка {source} не існує або це не директорія.")
-        logging.error(f"Вихідна папка {source} не існує або це не директорія.")
+        logging.error("Вихідна папка %s не існує або це не директорія.", source)
         return
 
-    await output_folder.mkdir(exist_ok=True, parents=True)
+    output_folder.mkdir(exist_ok=True, parents=True)
     
 
     print(f"Сортування файлів з папки: {source}")
     print(f"Файли будуть розміщені у папці: {output_folder}")
-    logging.info(f"Початок сортування файлів з папки {source} до {output_folder}")
+    logging.info("Початок сортування файлів з папки %s до %s", source, output_folder)
 
     start = time()
     
-    task = asyncio.create_task(read_folder(source, output_folder))
-    
-    await task
+    # Стандартний пул потоків обмежений min(32, CPU + 4) потоками, тож без власного
+    # пулу одночасних копіювань було б менше, ніж споживачів
+    workers = max(1, args.workers)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+
+    file_queue = asyncio.Queue()
+    progress = Counter()
+    reporter = asyncio.create_task(report_progress(progress))
+    await asyncio.gather(
+        produce_files(source, file_queue, workers, progress),
+        *(consume_files(file_queue, output_folder, progress) for _ in range(workers)),
+    )
+    reporter.cancel()
+    prefix = '\r' if sys.stdout.isatty() else ''
+    print(f"{prefix}Скопійовано файлів: {progress['copied']}/{progress['total']}")
    
     elapsed_time = time() - start
-    logging.info(f"Завдання завершилося успішно за {elapsed_time:.2f} секунд.")
+    logging.info("Скопійовано файлів: %d/%d.", progress['copied'], progress['total'])
+    logging.info("Завдання завершилося успішно за %.2f секунд.", elapsed_time)
     print(f"Завдання завершилося успішно")
     print(f"Час виконання: {elapsed_time:.2f} секунд.")
 
 
 if __name__ == '__main__':
-    setup_logging()  # Налаштовуємо логування
-    asyncio.run(main())
+    listener = setup_logging()  # Налаштовуємо логування
+    try:
+        # uvloop має швидший за стандартний цикл подій планувальник задач
+        if uvloop is not None and sys.platform != 'win32':
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
+    finally:
+        listener.stop()  # Дописуємо у файл записи, що залишилися в черзі
@@ -1,72 +1,68 @@
-import string
+import re
+from typing import Iterable, Iterator, Optional, Union
 import requests
-from concurrent.futures import ThreadPoolExecutor
-from collections import defaultdict
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
 import matplotlib.pyplot as plt
+from matplotlib import colormaps
 import logging
 
 # Налаштування логування
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Слово — послідовність щонайменше з 4 літер (будь-якого алфавіту, без цифр і "_")
+_WORD_RE = re.compile(r"[^\W\d_]{4,}")
+# Хвіст фрагмента, що може бути початком слова, обірваного межею фрагмента
+_TAIL_RE = re.compile(r"[^\W\d_]*\Z")
+_TAIL_WINDOW = 256
+# Те саме для байтів: лише ASCII-літери, без декодування тексту
+_WORD_RE_B = re.compile(rb"[A-Za-z]{4,}")
+_TAIL_RE_B = re.compile(rb"[A-Za-z]*\Z")
+
+# Розмір фрагмента при потоковому завантаженні тексту
+CHUNK_SIZE = 1 << 20
+
+# Палітра для кругової діаграми
+_TAB20 = colormaps['tab20']
+
 # Функція для завантаження тексту з URL
-def get_text(url: str) -> str:
+def get_text(url: str, raw: bool = False) -> Optional[Union[Iterator[str], Iterator[bytes]]]:
     """
-    Завантажує текст за заданою URL-адресою.
+    Потоково завантажує текст за заданою URL-адресою.
     
     :param url: URL для завантаження тексту.
-    :return: Текст у вигляді рядка або None у разі помилки.
+    :param raw: Повертати фрагменти як байти, без визначення кодування та декодування.
+    :return: Ітератор фрагментів тексту або None, якщо запит не вдався (помилка з'єднання
+             чи HTTP). Помилки мережі під час читання тіла (requests.RequestException)
+             виникають уже під час ітерації.
     """
+    response = None
     try:
-        response = requests.get(url)
+        response = requests.get(url, stream=True)
         response.raise_for_status()  # Перевірка на помилки HTTP
-        return response.text
     except requests.RequestException as e:
+        if response is not None:
+            response.close()
         logging.error(f"Помилка при завантаженні тексту: {e}")
         return None
+    if not raw:
+        # Без кодування у заголовках iter_content віддає байти, тож задаємо його явно
+        response.encoding = response.encoding or 'utf-8'
+    return read_chunks(response, decode=not raw)
 
-# Функція для видалення знаків пунктуації
-def remove_punctuation(text: str) -> str:
-    """
-    Видаляє всі знаки пунктуації з тексту.
-    
-    :param text: Вхідний текст.
-    :return: Текст без пунктуації.
-    """
-    return text.translate(str.maketrans("", "", string.punctuation))
-
-# Map функція
-def map_function(word: str) -> tuple[str, int]:
-    """
-    Повертає кортеж зі словом і числом 1 для мапінгу.
-    
-    :param word: Вхідне слово.
-    :return: Кортеж (слово, 1).
-    """
-    return word, 1
-
-# Shuffle функція
-def shuffle_function(mapped_values: list[tuple[str, int]]) -> dict[str, list[int]]:
-    """
-    Перегруповує результати мапінгу, збираючи однакові слова разом.
-    
-    :param mapped_values: Список кортежів (слово, 1).
-    :return: Перегруповані значення (слово, [1, 1, ...]).
-    """
-    shuffled = defaultdict(list)
-    for key, value in mapped_values:
-        shuffled[key].append(value)
-    return shuffled.items()
-
-# Reduce функція
-def reduce_function(key_values: tuple[str, list[int]]) -> tuple[str, int]:
+# Функція для читання тіла відповіді фрагментами
+def read_chunks(response: requests.Response, decode: bool) -> Union[Iterator[str], Iterator[bytes]]:
     """
-    Підраховує загальну кількість кожного слова.
+    Віддає тіло відповіді фрагментами і закриває з'єднання, щойно читання завершено
+    або перервано.
     
-    :param key_values: Кортеж (слово, список [1, 1, ...]).
-    :return: Кортеж (слово, сума кількості).
+    :param response: Потокова відповідь requests.
+    :param decode: Декодувати фрагменти у рядки за кодуванням відповіді.
+    :return: Ітератор фрагментів тексту.
     """
-    key, values = key_values
-    return key, sum(values)
+    with response:
+        yield from response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=decode)
 
 # MapReduce функція
 def map_reduce(text: str) -> dict[str, int]:
@@ -77,24 +73,39 @@ def map_reduce(text: str) -> dict[str, int]:
     :return: Словник частот слів.
     """
     
-    text = remove_punctuation(text)
-    words = text.split()
-
-    # Фільтрація слів довжиною 5 і більше символів
-    words = [word for word in words if len(word) >= 4]
-
-    # Паралельний Мапінг
-    with ThreadPoolExecutor() as executor:
-        mapped_values = list(executor.map(map_function, words))
-
-    # Shuffle
-    shuffled_values = shuffle_function(mapped_values)
+    # Токенізація, відкидання пунктуації та фільтр довжини — одним проходом regex
+    words = _WORD_RE.findall(text.lower())
 
-    # Паралельна Редукція
-    with ThreadPoolExecutor() as executor:
-        reduced_values = list(executor.map(reduce_function, shuffled_values))
+    # Map + Shuffle + Reduce одним проходом: Counter рахує слова у C-циклі,
+    # без пулів потоків і проміжних списків (слово, 1)
+    return dict(Counter(words))
 
-    return dict(reduced_values)
+# Потоковий підрахунок слів
+def stream_word_counts(chunks: Union[Iterable[str], Iterable[bytes]]) -> dict[str, int]:
+    """
+    Підраховує частоти слів по фрагментах тексту, не збираючи весь текст у пам'яті.
+    Фрагменти-байти обробляються без декодування, але враховуються лише ASCII-слова.
+    
+    :param chunks: Фрагменти вхідного тексту (рядки або байти).
+    :return: Словник частот слів.
+    """
+    counts = Counter()
+    tail = None
+    for chunk in chunks:
+        word_re, tail_re = (_WORD_RE_B, _TAIL_RE_B) if isinstance(chunk, bytes) else (_WORD_RE, _TAIL_RE)
+        buf = chunk if tail is None else tail + chunk
+        # Останнє слово може продовжуватися в наступному фрагменті — відкладаємо його.
+        # Шукаємо лише в кінці буфера; якщо слово довше за вікно — по всьому буферу
+        start = max(0, len(buf) - _TAIL_WINDOW)
+        cut = tail_re.search(buf, start).start()
+        if cut == start:
+            cut = tail_re.search(buf).start()
+        counts.update(word_re.findall(buf[:cut].lower()))
+        tail = buf[cut:]
+    if tail:
+        counts.update(word_re.findall(tail.lower()))
+    # Декодуємо лише унікальні слова, а не весь текст
+    return {(word.decode('ascii') if isinstance(word, bytes) else word): count for word, count in counts.items()}
 
     
 
@@ -107,12 +118,12 @@ def visualize_top_words(word_freq: dict[str, int], top_n: int ) -> None:
     :param top_n: Кількість слів для відображення.
     """
     
-    # Сортування та відбір топ слів
-    sorted_words = sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:top_n]
+    # Відбір топ слів через купу — без сортування всього словника
+    sorted_words = nlargest(top_n, word_freq.items(), key=itemgetter(1))
 
     # Підготовка даних для візуалізації
     words, frequencies = zip(*sorted_words)
-    colors = plt.cm.get_cmap('tab20', len(words)).colors  # Кольори для кругової діаграми
+    colors = _TAB20.resampled(len(words)).colors  # Кольори для кругової діаграми
 
     # Виведення результатів у консоль
     print(f"Топ {top_n} слів за частотою використання:")
@@ -135,15 +146,19 @@ if __name__ == '__main__':
     # Вхідний текст для обробки
     url = "https://gutenberg.net.au/ebooks01/0100021.txt"
     try:
-        text = get_text(url)
-        if text:
-            # Виконання MapReduce на вхідному тексті
-            result = map_reduce(text)
+        # Текст англійською, тож рахуємо ASCII-слова прямо в байтах
+        chunks = get_text(url, raw=True)
+        if chunks:
+            # Виконання MapReduce на вхідному тексті по мірі завантаження
+            result = stream_word_counts(chunks)
 
             # Виведення та візуалізація топ слів
             visualize_top_words(result, top_n=15)
         else:
             raise ValueError("Текст не був завантажений.")
+    except requests.RequestException as e:
+        # Обрив з'єднання під час читання тексту
+        logging.error(f"Помилка при завантаженні тексту: {e}")
     except Exception as e:
         logging.error(f"Помилка в головному блоці: {e}")
         